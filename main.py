@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Módulo: main.py
+Descripción: Evaluación de la fórmula ASTM E900-15 sobre el dataset de
+    vigilancia, como línea base física frente a los modelos de aprendizaje.
+Autor: Samuel Martín Martínez
+Fecha: 2026
+"""
+
+import numpy as np
+
+from src.astm.formula import COLUMNAS_FORMULA, astm_e900_15_matrix
+from src.config import DATA_DIR
+from src.dataset.dataset import cargar_dataset
+
+
+def predicciones_formula(df, cache_path=None):
+    """Devuelve las predicciones ASTM del dataset, cacheadas en disco.
+
+    La fórmula depende únicamente del CSV, no de la época de entrenamiento:
+    se calcula una vez, se persiste como .npy y las ejecuciones siguientes
+    (o cada época de la PINN, indexando por batch) la recargan mientras el
+    CSV no haya cambiado.
+
+    Args:
+        df (pd.DataFrame): Dataset cargado con cargar_dataset.
+        cache_path (Path, optional): Ruta del .npy de caché; por defecto
+            data/pred_astm.npy.
+
+    Returns:
+        np.array: TTS predicho en grados Celsius (float32).
+    """
+    csv_path = DATA_DIR / 'df_plotter_cm2.csv'
+    if cache_path is None:
+        cache_path = DATA_DIR / 'pred_astm.npy'
+
+    if (cache_path.exists() and csv_path.exists()
+            and cache_path.stat().st_mtime >= csv_path.stat().st_mtime):
+        preds = np.load(cache_path)
+        if preds.shape[0] == len(df):
+            return preds
+
+    X = np.ascontiguousarray(
+        df[list(COLUMNAS_FORMULA)].to_numpy(dtype=np.float32)
+    )
+    preds = astm_e900_15_matrix(X, df['PF_code'].to_numpy(np.int8))
+    np.save(cache_path, preds)
+    return preds
+
+
+def evaluar_formula(chunksize=None):
+    """Calcula el RMSE de la fórmula ASTM E900-15 sobre el dataset.
+
+    Args:
+        chunksize (int, optional): Si se indica, evalúa en streaming
+            acumulando la suma de cuadrados por chunk, sin materializar el
+            dataset ni las predicciones completas en memoria.
+
+    Returns:
+        float: RMSE en grados Celsius.
+    """
+    if chunksize is None:
+        df = cargar_dataset()
+        preds_fisica = predicciones_formula(df)
+        diff = df['DT41J_Celsius'].to_numpy(dtype=np.float64) - preds_fisica
+        return float(np.sqrt(np.dot(diff, diff) / diff.size))
+
+    sse = 0.0
+    n = 0
+
+    for chunk in cargar_dataset(chunksize=chunksize):
+        chunk = chunk.dropna()
+
+        # Empaquetamos las seis columnas numéricas en una única matriz
+        # contigua: el kernel recorre cada fila con sus seis valores en la
+        # misma línea de caché, en lugar de seis arrays independientes.
+        X = np.ascontiguousarray(
+            chunk[list(COLUMNAS_FORMULA)].to_numpy(dtype=np.float32)
+        )
+        # Los códigos enteros vienen cacheados en PF_code por cargar_dataset,
+        # sin re-escanear las cadenas de Product_Form en cada llamada.
+        code = chunk['PF_code'].to_numpy(np.int8)
+
+        preds_fisica = astm_e900_15_matrix(X, code)
+
+        # Residuo, cuadrado y reducción fusionados: np.dot(diff, diff) corre
+        # como un ddot de BLAS con SIMD, sin array temporal del cuadrado.
+        # La resta en float64 mantiene el acumulador sin cancelación.
+        diff = chunk['DT41J_Celsius'].to_numpy(dtype=np.float64) - preds_fisica
+        sse += np.dot(diff, diff)
+        n += diff.size
+
+    return float(np.sqrt(sse / n))
+
+
+def main():
+    rmse = evaluar_formula()
+    print(f"RMSE de la fórmula ASTM E900-15: {rmse:.4f} °C")
+
+
+if __name__ == '__main__':
+    main()
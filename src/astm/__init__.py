@@ -0,0 +1,22 @@
+"""Punto de entrada único a la fórmula ASTM E900-15.
+
+El módulo formula.py contiene la única definición de la correlación; estas
+re-exportaciones son la vía canónica de importarla desde el resto del
+proyecto.
+"""
+
+from .formula import (
+    COLUMNAS_FORMULA,
+    astm_e900_15,
+    astm_e900_15_matrix,
+    astm_e900_15_torch,
+    codificar_product_form,
+)
+
+__all__ = [
+    'COLUMNAS_FORMULA',
+    'astm_e900_15',
+    'astm_e900_15_matrix',
+    'astm_e900_15_torch',
+    'codificar_product_form',
+]
@@ -2,6 +2,9 @@
 Modulo: dataset.py
 """
 
+import functools
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 import torch
@@ -9,6 +12,117 @@ from torch.utils.data import Dataset, Subset
 from sklearn import model_selection
 from sklearn.preprocessing import StandardScaler
 
+from src.config import DATA_DIR
+
+# Columnas del CSV que realmente se utilizan y sus dtypes explícitos:
+# leer solo estas columnas con tipos fijos evita la inferencia de dtypes
+# y reduce a la mitad la memoria de las columnas numéricas.
+COLUMNAS_DATASET = ['DT41J_Celsius', 'Fluence_n_cm2', 'Cu', 'Ni', 'P', 'Mn',
+                    'Temperature_Celsius', 'Product_Form']
+DTYPES_DATASET = {
+    'DT41J_Celsius': 'float32',
+    'Fluence_n_cm2': 'float32',
+    'Cu': 'float32',
+    'Ni': 'float32',
+    'P': 'float32',
+    'Mn': 'float32',
+    'Temperature_Celsius': 'float32',
+    # Categorías en el orden de las tablas de coeficientes de la fórmula
+    # (W=0, F=1, P=2): los códigos de la categoría sirven directamente como
+    # índice de LUT, sin re-mapear cadenas.
+    'Product_Form': pd.CategoricalDtype(['W', 'F', 'P']),
+}
+
+
+def _anadir_pf_code(df):
+    """Cachea la codificación entera del tipo de producto en el DataFrame.
+
+    Las llamadas repetidas a la fórmula (por ejemplo dentro de un bucle de
+    entrenamiento) reutilizan la columna PF_code sin volver a recorrer las
+    cadenas de Product_Form.
+    """
+    # Con las categorías fijadas en orden W/F/P, los códigos del dtype
+    # categórico ya coinciden con la convención de la fórmula; solo los
+    # valores fuera de catálogo (código -1) se reasignan a "otro" (2).
+    codes = df['Product_Form'].cat.codes.to_numpy(np.int8)
+    df['PF_code'] = np.where(codes < 0, 2, codes).astype(np.int8)
+    return df
+
+
+def convertir_a_parquet(csv_path=None, parquet_path=None):
+    """Conversión única del CSV a Parquet columnar con dtypes preservados.
+
+    Las cargas posteriores leen el binario directamente, sin tokenización de
+    texto ni inferencia de tipos (incluida la categoría de Product_Form).
+
+    Args:
+      csv_path: Ruta al CSV; por defecto data/df_plotter_cm2.csv.
+      parquet_path: Ruta de salida; por defecto el mismo nombre con
+        extensión .parquet.
+
+    Returns:
+      La ruta del archivo Parquet generado.
+    """
+    if csv_path is None:
+      csv_path = DATA_DIR / 'df_plotter_cm2.csv'
+    csv_path = Path(csv_path)
+    if parquet_path is None:
+      parquet_path = csv_path.with_suffix('.parquet')
+
+    pd.read_csv(csv_path, usecols=COLUMNAS_DATASET,
+                dtype=DTYPES_DATASET).to_parquet(parquet_path)
+    return parquet_path
+
+
+@functools.lru_cache(maxsize=1)
+def _cargar_dataset_completo(csv_path):
+    """Carga completa del dataset, memoizada por ruta dentro del proceso.
+
+    Si junto al CSV existe un Parquet al día (ver convertir_a_parquet), se
+    lee este en su lugar: la carga columnar binaria evita todo el parseo de
+    texto.
+    """
+    parquet_path = csv_path.with_suffix('.parquet')
+    if (parquet_path.exists()
+            and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime):
+      df = pd.read_parquet(parquet_path, columns=COLUMNAS_DATASET)
+    else:
+      df = pd.read_csv(csv_path, usecols=COLUMNAS_DATASET,
+                       dtype=DTYPES_DATASET)
+    return _anadir_pf_code(df.dropna())
+
+
+def cargar_dataset(csv_path=None, chunksize=None):
+    """Carga el dataset de vigilancia restringido a las columnas usadas.
+
+    La carga completa se memoiza por proceso: varios consumidores (la
+    evaluación de la fórmula, los notebooks, el entrenamiento) comparten el
+    mismo DataFrame sin repetir la lectura del CSV, por lo que no debe
+    modificarse in situ.
+
+    Args:
+      csv_path: Ruta al CSV; por defecto data/df_plotter_cm2.csv.
+      chunksize: Si se indica, devuelve un iterador de DataFrames de ese
+        tamaño en lugar de cargar el archivo completo (lectura en
+        streaming, con pico de memoria acotado por el chunk y sin
+        memoización).
+
+    Returns:
+      Un DataFrame sin filas con NaN y con la columna PF_code añadida, o un
+      iterador de chunks equivalentes (a los que el llamante debe aplicar
+      dropna) si se indicó chunksize.
+    """
+    if csv_path is None:
+      csv_path = DATA_DIR / 'df_plotter_cm2.csv'
+    csv_path = Path(csv_path)
+
+    if chunksize is not None:
+      lector = pd.read_csv(csv_path, usecols=COLUMNAS_DATASET,
+                           dtype=DTYPES_DATASET, chunksize=chunksize)
+      return (_anadir_pf_code(chunk) for chunk in lector)
+
+    return _cargar_dataset_completo(csv_path)
+
 
 class RadiationDataset(Dataset):
   """Clase Dataset de PyTorch para datos de fragilización por radiación.
@@ -8,10 +8,11 @@ utilizados durante la realización de este proyecto de fin de master.
 import os
 import xgboost as xgb
 import numpy as np
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import torch
 import torch.nn as nn
 
+from src.astm.formula import astm_e900_15_torch
+
 class BaselineXGBoost:
     """Clase para entrenar y evaluar un modelo XGBoost como línea base."""
 
@@ -63,10 +64,15 @@ class BaselineXGBoost:
             print("\n(Métricas calculadas sobre datos normalizados)")
         # -------------------------------
         
-        mse = mean_squared_error(y_test, preds)
-        rmse = np.sqrt(mse)
-        mae = mean_absolute_error(y_test, preds)
-        r2 = r2_score(y_test, preds)
+        # Métricas en NumPy puro: un residuo y reducciones fusionadas, sin
+        # pagar el import de sklearn.metrics solo para tres one-liners.
+        y_test = np.asarray(y_test, dtype=np.float64)
+        diff = y_test - np.asarray(preds, dtype=np.float64)
+        mse = float(np.dot(diff, diff) / diff.size)
+        rmse = float(np.sqrt(mse))
+        mae = float(np.mean(np.abs(diff)))
+        y_centrado = y_test - y_test.mean()
+        r2 = 1.0 - mse * diff.size / float(np.dot(y_centrado, y_centrado))
         
         print("\n--- Resultados XGBoost Baseline ---")
         print(f"MSE:  {mse:.4f}")
@@ -139,44 +145,26 @@ class PINNEmbrittlement(nn.Module):
 
     def astm_e900_pytorch(self, x_real):
         """
-        Traducción de tu formula.py a operaciones de PyTorch.
+        Evalúa la fórmula física delegando en formula.astm_e900_15_torch.
         Recibe tensores en escala REAL (no normalizados).
         """
         prod_form = x_real[:, 0]
-        cu = x_real[:, 1]
-        ni = x_real[:, 2]
-        mn = x_real[:, 3]
-        p = x_real[:, 4]
-        temp_c = x_real[:, 5]
-        fluence = x_real[:, 6] * 1e4 
-        
-        A_coeff = torch.where(prod_form == 2.0, 0.919, 
-                  torch.where(prod_form == 0.0, 1.011, 1.080))
-        
-        B_coeff = torch.where(prod_form == 2.0, 0.968, 
-                  torch.where(prod_form == 0.0, 0.738, 0.819))
-
-        term1 = A_coeff * (5/9) * 1.8943e-12 * (fluence ** 0.5695)
-        term2 = ((1.8 * temp_c + 32) / 550) ** -5.47
-        term3 = (0.09 + p / 0.012) ** 0.216
-        term4 = (1.66 + (ni ** 8.54) / 0.63) ** 0.39
-        term5 = (mn / 1.36) ** 0.3
-        TTS1 = term1 * term2 * term3 * term4 * term5
-        
-        ln_phi = torch.log(fluence)
-        ln_phi_ref = torch.log(torch.tensor(4.5e20, device=x_real.device))
-        
-        m_term1 = torch.clamp(113.87 * (ln_phi - ln_phi_ref), min=0.0, max=612.6)
-        m_term2 = ((1.8 * temp_c + 32) / 550) ** -5.45
-        m_term3 = (0.1 + p / 0.012) ** -0.098
-        m_term4 = (0.168 + (ni ** 0.58) / 0.63) ** 0.73
-        
-        M = B_coeff * m_term1 * m_term2 * m_term3 * m_term4
-        cu_term = torch.clamp(torch.clamp(cu, max=0.28) - 0.053, min=0.0)
-        
-        TTS2 = (5/9) * M * cu_term
-        
-        return (TTS1 + TTS2).view(-1, 1)
+
+        # Los códigos de categoría de pandas (F=0, P=1, W=2) se remapean a
+        # la convención de formula.py (W=0, F=1, otro=2).
+        code = torch.where(prod_form == 2.0, 0,
+               torch.where(prod_form == 0.0, 1, 2))
+
+        tts = astm_e900_15_torch(
+            cu=x_real[:, 1],
+            ni=x_real[:, 2],
+            p=x_real[:, 4],
+            mn=x_real[:, 3],
+            temp_c=x_real[:, 5],
+            fluence=x_real[:, 6],
+            code=code,
+        )
+        return tts.view(-1, 1)
 
     def unscale_inputs(self, x_scaled):
         """Desnormaliza los inputs usando el preprocesador del dataset."""